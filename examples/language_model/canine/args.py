@@ -81,6 +81,12 @@ def parse_args():
         help=
         "Proportion of training steps to perform linear learning rate warmup for."
     )
+    parser.add_argument(
+        "--gradient_accumulation_steps",
+        type=int,
+        default=1,
+        help=
+        "Number of micro-batches to accumulate before one optimizer update.")
     parser.add_argument("--logging_steps",
                         type=int,
                         default=500,
@@ -148,9 +154,22 @@ def parse_args():
     parser.add_argument("--do_predict",
                         action='store_true',
                         help="Whether to predict.")
+    parser.add_argument(
+        "--use_inference",
+        action='store_true',
+        help=
+        "Whether to export the model and run prediction with the Paddle Inference "
+        "backend (TensorRT on gpu, MKLDNN on cpu) instead of the dygraph model.")
     parser.add_argument("--fp16",
                         action='store_true',
                         help="Whether to use mix precision training.")
+    parser.add_argument(
+        "--bf16",
+        action='store_true',
+        help=
+        "Whether to use bfloat16 mix precision training. bfloat16 keeps the "
+        "fp32 dynamic range, so no loss scaling is needed; requires Ampere or "
+        "newer GPUs. Takes precedence over --fp16.")
     parser.add_argument("--init_loss_scaling",
                         type=float,
                         default=2**15,
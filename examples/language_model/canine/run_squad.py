@@ -20,6 +20,9 @@ import random
 import time
 import json
 import math
+import hashlib
+import inspect
+import contextlib
 from functools import partial
 import numpy as np
 import paddle
@@ -28,7 +31,6 @@ from paddle.amp import GradScaler, auto_cast
 from paddle.io import DataLoader
 from args import parse_args
 
-from paddlenlp.data import DataCollatorWithPadding
 from paddlenlp.transformers import CanineForQuestionAnswering, CanineTokenizer
 from paddlenlp.transformers import LinearDecayWithWarmup
 from paddlenlp.metrics.squad import squad_evaluate, compute_prediction
@@ -36,6 +38,88 @@ from datasets import load_dataset
 
 MODEL_CLASSES = {'canine': (CanineForQuestionAnswering, CanineTokenizer)}
 
+# `prefetch_factor` only exists from paddle 2.4; on the older supported
+# releases the loaders keep the default prefetch depth.
+LOADER_PREFETCH_KWARGS = {
+    "prefetch_factor": 4
+} if "prefetch_factor" in inspect.signature(
+    DataLoader.__init__).parameters else {}
+
+
+def _label_answer_span(offsets, seq_ids, start_char, end_char, cls_index):
+    # NumPy fallback: argmax/searchsorted turn each O(seq_len) scan into a
+    # single C-level call over the (sorted) character offsets.
+    context_mask = seq_ids == 1
+    token_start_index = int(np.argmax(context_mask))
+    token_end_index = len(seq_ids) - 2 - int(np.argmax(context_mask[::-1]))
+
+    if not (offsets[token_start_index, 0] <= start_char
+            and offsets[token_end_index, 1] >= end_char):
+        return cls_index, cls_index
+
+    # `token_end_index` already points one before the last context token,
+    # so the start scan must still include that last token (+ 2); the end
+    # scan begins at `token_end_index` itself (+ 1).
+    context_starts = offsets[token_start_index:token_end_index + 2, 0]
+    context_ends = offsets[token_start_index:token_end_index + 1, 1]
+    pos = int(np.searchsorted(context_starts, start_char, side='right'))
+    if pos == len(context_starts):
+        # The answer starts at the last context token, so the original scan
+        # would run past the trailing special tokens whose offsets restart
+        # at zero.
+        token_start_index = len(offsets)
+    else:
+        token_start_index += pos
+    num_ge = len(context_ends) - int(
+        np.searchsorted(context_ends, end_char, side='left'))
+    token_end_index -= num_ge
+    if num_ge == len(context_ends):
+        # Every context end reached end_char, so the original scan would
+        # keep walking down through the question tokens; finish it there.
+        while offsets[token_end_index, 1] >= end_char:
+            token_end_index -= 1
+    return token_start_index - 1, token_end_index + 1
+
+
+def _label_answer_span_scalar(offsets, seq_ids, start_char, end_char,
+                              cls_index):
+    # Straight-line integer loops mirroring the original labeling logic,
+    # written so that Numba can compile them to machine code.
+    token_start_index = 0
+    while seq_ids[token_start_index] != 1:
+        token_start_index += 1
+
+    token_end_index = offsets.shape[0] - 1
+    while seq_ids[token_end_index] != 1:
+        token_end_index -= 1
+    token_end_index -= 1
+
+    if not (offsets[token_start_index, 0] <= start_char
+            and offsets[token_end_index, 1] >= end_char):
+        return cls_index, cls_index
+
+    while token_start_index < offsets.shape[0] and offsets[token_start_index,
+                                                           0] <= start_char:
+        token_start_index += 1
+    while offsets[token_end_index, 1] >= end_char:
+        token_end_index -= 1
+    return token_start_index - 1, token_end_index + 1
+
+
+try:
+    # Prefer the Cython-compiled alignment helper when the optional
+    # extension was built with the package.
+    from paddlenlp.data._align import label_answer_span as _label_answer_span
+except ImportError:
+    try:
+        from numba import njit
+
+        # Compile once per datasets.map worker; subsequent calls run without
+        # interpreter dispatch or boxing.
+        _label_answer_span = njit(cache=True)(_label_answer_span_scalar)
+    except ImportError:
+        pass
+
 
 def prepare_train_features(examples, tokenizer, args):
     # Some of the questions have lots of whitespace on the left, which is not useful and will make the
@@ -65,10 +149,16 @@ def prepare_train_features(examples, tokenizer, args):
     tokenized_examples["start_positions"] = []
     tokenized_examples["end_positions"] = []
 
+    # The CLS id is constant: hoist the tokenizer attribute access out of
+    # the per-feature loop, and skip the linear .index() scan in the common
+    # case where CLS sits at position 0.
+    cls_token_id = tokenizer.cls_token_id
+
     for i, offsets in enumerate(offset_mapping):
         # We will label impossible answers with the index of the CLS token.
         input_ids = tokenized_examples["input_ids"][i]
-        cls_index = input_ids.index(tokenizer.cls_token_id)
+        cls_index = 0 if input_ids[0] == cls_token_id else input_ids.index(
+            cls_token_id)
 
         # Grab the sequence corresponding to that example (to know what is the context and what is the question).
         sequence_ids = tokenized_examples['token_type_ids'][i]
@@ -87,38 +177,15 @@ def prepare_train_features(examples, tokenizer, args):
             start_char = answers["answer_start"][0]
             end_char = start_char + len(answers["text"][0])
 
-            # Start token index of the current span in the text.
-            token_start_index = 0
-            while sequence_ids[token_start_index] != 1:
-                token_start_index += 1
-
-            # End token index of the current span in the text.
-            token_end_index = len(input_ids) - 1
-            while sequence_ids[token_end_index] != 1:
-                token_end_index -= 1
-            token_end_index -= 1
-            if len(offsets) < token_end_index:
-                print(len(offsets), token_start_index, token_end_index)
-
-            # Detect if the answer is out of the span (in which case this feature is labeled with the CLS index).
-            if not (offsets[token_start_index][0] <= start_char
-                    and offsets[token_end_index][1] >= end_char):
-                tokenized_examples["start_positions"].append(cls_index)
-                tokenized_examples["end_positions"].append(cls_index)
-            else:
-                # Otherwise move the token_start_index and token_end_index to the two ends of the answer.
-                # Note: we could go after the last offset if the answer is the last word (edge case).
-
-                while token_start_index < len(offsets) and offsets[
-                        token_start_index][0] <= start_char:
-                    token_start_index += 1
-
-                tokenized_examples["start_positions"].append(token_start_index -
-                                                             1)
-                while offsets[token_end_index][1] >= end_char:
-                    token_end_index -= 1
-
-                tokenized_examples["end_positions"].append(token_end_index + 1)
+            # The per-token labeling runs as compiled code: either the
+            # Numba-jitted scalar loops or the NumPy argmax/searchsorted
+            # fallback, depending on what is installed.
+            start_position, end_position = _label_answer_span(
+                np.asarray(offsets, dtype=np.int32),
+                np.asarray(sequence_ids, dtype=np.int8), start_char, end_char,
+                cls_index)
+            tokenized_examples["start_positions"].append(start_position)
+            tokenized_examples["end_positions"].append(end_position)
 
     return tokenized_examples
 
@@ -156,11 +223,14 @@ def prepare_validation_features(examples, tokenizer, args):
         tokenized_examples["example_id"].append(examples["id"][sample_index])
 
         # Set to None the offset_mapping that are not part of the context so it's easy to determine if a token
-        # position is part of the context or not.
+        # position is part of the context or not. The per-token comparisons
+        # run as one C-level mask; only the None substitution stays in Python.
+        context_mask = np.asarray(sequence_ids, dtype=np.int8) == context_index
+        context_mask[-1] = False
         tokenized_examples["offset_mapping"][i] = [
-            (o if sequence_ids[k] == context_index
-             and k != len(sequence_ids) - 1 else None)
-            for k, o in enumerate(tokenized_examples["offset_mapping"][i])
+            o if keep else None
+            for o, keep in zip(tokenized_examples["offset_mapping"][i],
+                               context_mask.tolist())
         ]
 
     return tokenized_examples
@@ -172,28 +242,159 @@ def set_seed(args):
     paddle.seed(args.seed)
 
 
+def create_inference_predictor(model, args):
+    """
+    Export the trained dygraph model to a static graph once and build a
+    Paddle Inference predictor on top of it, with TensorRT FP16 on gpu and
+    MKLDNN on cpu. Same FLOPs as the dygraph forward, but without per-op
+    Python dispatch and with fused kernels.
+    """
+    model_to_save = model._layers if isinstance(model,
+                                                paddle.DataParallel) else model
+    save_path = os.path.join(args.output_dir, "inference", "canine")
+    input_spec = [
+        paddle.static.InputSpec(shape=[None, None],
+                                dtype="int64",
+                                name="input_ids"),
+        paddle.static.InputSpec(shape=[None, None],
+                                dtype="int64",
+                                name="token_type_ids"),
+        paddle.static.InputSpec(shape=[None, None],
+                                dtype="int64",
+                                name="attention_mask"),
+    ]
+    paddle.jit.save(paddle.jit.to_static(model_to_save,
+                                         input_spec=input_spec), save_path)
+
+    config = paddle.inference.Config(save_path + ".pdmodel",
+                                     save_path + ".pdiparams")
+    if args.device == "gpu":
+        config.enable_use_gpu(100, 0)
+        # The model is exported with [None, None] inputs and the sorted
+        # sampler feeds a different padded shape nearly every batch, so
+        # TRT needs tuned dynamic shapes: the first run only records the
+        # observed shape ranges and later runs build the fp16 engine from
+        # the persisted file.
+        shape_range_file = save_path + "_shape_range_info.pbtxt"
+        if os.path.exists(shape_range_file):
+            config.enable_tensorrt_engine(
+                workspace_size=1 << 30,
+                max_batch_size=args.batch_size,
+                precision_mode=paddle.inference.PrecisionType.Half)
+            config.enable_tuned_tensorrt_dynamic_shape(shape_range_file, True)
+        else:
+            config.collect_shape_range_info(shape_range_file)
+    else:
+        config.disable_gpu()
+        config.enable_mkldnn()
+        config.set_cpu_math_library_num_threads(os.cpu_count() or 1)
+    config.switch_use_feed_fetch_ops(False)
+    config.enable_memory_optim()
+    return paddle.inference.create_predictor(config)
+
+
 @paddle.no_grad()
-def evaluate(model, data_loader, raw_dataset, features, args):
+def evaluate(model,
+             data_loader,
+             raw_dataset,
+             features,
+             args,
+             predictor=None,
+             restore_indices=None):
     model.eval()
 
-    all_start_logits = []
-    all_end_logits = []
+    # Preallocate the full logits matrices: batch rows are assigned by
+    # slice, avoiding per-feature ndarray views, Python list growth and the
+    # final list-to-array conversion inside compute_prediction. Positions
+    # beyond a feature's length stay zero and are filtered out downstream
+    # by the offset_mapping bounds checks.
+    num_features = len(features)
+    all_start_logits = np.zeros((num_features, args.max_seq_length),
+                                dtype=np.float32)
+    all_end_logits = np.zeros((num_features, args.max_seq_length),
+                              dtype=np.float32)
+    num_collected = 0
     tic_eval = time.time()
 
+    if predictor is not None:
+        input_handles = [
+            predictor.get_input_handle(name)
+            for name in predictor.get_input_names()
+        ]
+        output_handles = [
+            predictor.get_output_handle(name)
+            for name in predictor.get_output_names()
+        ]
+
+    # On GPU, ship each batch's logits to pinned host memory on a side
+    # stream while the next batch's forward runs on the default stream, so
+    # the PCIe transfer is hidden behind compute.
+    use_async_copy = predictor is None and paddle.device.get_device(
+    ).startswith('gpu')
+    copy_stream = paddle.device.cuda.Stream() if use_async_copy else None
+
+    def collect_logits(start_tensor, end_tensor):
+        nonlocal tic_eval, num_collected
+        if use_async_copy:
+            copy_stream.synchronize()
+        start_arr = start_tensor.numpy() if paddle.is_tensor(
+            start_tensor) else start_tensor
+        end_arr = end_tensor.numpy() if paddle.is_tensor(
+            end_tensor) else end_tensor
+        batch_size, width = start_arr.shape
+        all_start_logits[num_collected:num_collected +
+                         batch_size, :width] = start_arr
+        all_end_logits[num_collected:num_collected +
+                       batch_size, :width] = end_arr
+        num_collected += batch_size
+
+        if num_collected // 1000 != (num_collected - batch_size) // 1000:
+            print("Processing example: %d" % num_collected)
+            print('time per 1000:', time.time() - tic_eval)
+            tic_eval = time.time()
+
+    pending = None
     for batch in data_loader:
+        if predictor is not None:
+            input_handles[0].copy_from_cpu(batch['input_ids'].numpy())
+            input_handles[1].copy_from_cpu(batch['token_type_ids'].numpy())
+            input_handles[2].copy_from_cpu(batch['attention_mask'].numpy())
+            predictor.run()
+            collect_logits(output_handles[0].copy_to_cpu(),
+                           output_handles[1].copy_to_cpu())
+            continue
+
         start_logits_tensor, end_logits_tensor = model(
             batch['input_ids'],
             token_type_ids=batch['token_type_ids'],
             attention_mask=batch['attention_mask'])
 
-        for idx in range(start_logits_tensor.shape[0]):
-            if len(all_start_logits) % 1000 == 0 and len(all_start_logits):
-                print("Processing example: %d" % len(all_start_logits))
-                print('time per 1000:', time.time() - tic_eval)
-                tic_eval = time.time()
+        if use_async_copy:
+            # Order the side stream after the forward: the D2H copy must
+            # not start before the default stream has written the logits.
+            copy_stream.wait_stream(paddle.device.cuda.current_stream())
+            with paddle.device.cuda.stream_guard(copy_stream):
+                batch_logits = (start_logits_tensor.pin_memory(),
+                                end_logits_tensor.pin_memory())
+        else:
+            batch_logits = (start_logits_tensor, end_logits_tensor)
+
+        # Double buffering: consume the previous batch only after its copy
+        # had a full forward pass worth of time to complete.
+        if pending is not None:
+            collect_logits(*pending)
+        pending = batch_logits
 
-            all_start_logits.append(start_logits_tensor.numpy()[idx])
-            all_end_logits.append(end_logits_tensor.numpy()[idx])
+    if pending is not None:
+        collect_logits(*pending)
+
+    if restore_indices is not None:
+        # The loader visited features in length-sorted order; map the
+        # logits back to the original feature order in one fancy-index op.
+        inverse = np.empty(len(restore_indices), dtype=np.int64)
+        inverse[restore_indices] = np.arange(len(restore_indices))
+        all_start_logits = all_start_logits[inverse]
+        all_end_logits = all_end_logits[inverse]
 
     print("Computing prediction...")
     all_predictions, all_nbest_json, scores_diff_json = compute_prediction(
@@ -213,6 +414,56 @@ def evaluate(model, data_loader, raw_dataset, features, args):
     model.train()
 
 
+class SortedBatchSampler(paddle.io.BatchSampler):
+    """
+    Yield consecutive chunks of a precomputed index order (e.g. indices
+    sorted by sequence length), so every batch is padded to a near-uniform
+    length instead of the max over a random mix of long and short features.
+    """
+
+    def __init__(self, indices, batch_size):
+        self._indices = [int(i) for i in indices]
+        self._batch_size = batch_size
+
+    def __iter__(self):
+        for i in range(0, len(self._indices), self._batch_size):
+            yield self._indices[i:i + self._batch_size]
+
+    def __len__(self):
+        return (len(self._indices) + self._batch_size - 1) // self._batch_size
+
+
+class NumpyPadCollator:
+    """
+    Pad a batch of tokenized features directly into preallocated NumPy
+    arrays instead of going through the per-sample Python padding inside
+    `tokenizer.pad`, then convert each field to a tensor once per batch.
+    """
+
+    pad_keys = ("input_ids", "token_type_ids", "attention_mask")
+
+    def __init__(self, tokenizer):
+        self.pad_token_id = tokenizer.pad_token_id
+
+    def __call__(self, features):
+        batch_size = len(features)
+        max_len = max(len(f["input_ids"]) for f in features)
+        batch = {}
+        for key in self.pad_keys:
+            if key not in features[0]:
+                continue
+            pad_value = self.pad_token_id if key == "input_ids" else 0
+            arr = np.full((batch_size, max_len), pad_value, dtype="int64")
+            for i, f in enumerate(features):
+                arr[i, :len(f[key])] = f[key]
+            batch[key] = paddle.to_tensor(arr)
+        for key in features[0]:
+            if key not in self.pad_keys:
+                batch[key] = paddle.to_tensor(
+                    np.asarray([f[key] for f in features], dtype="int64"))
+        return batch
+
+
 class CrossEntropyLossForSQuAD(paddle.nn.Layer):
 
     def __init__(self):
@@ -221,14 +472,14 @@ class CrossEntropyLossForSQuAD(paddle.nn.Layer):
     def forward(self, y, label):
         start_logits, end_logits = y
         start_position, end_position = label
-        start_position = paddle.unsqueeze(start_position, axis=-1)
-        end_position = paddle.unsqueeze(end_position, axis=-1)
-        start_loss = paddle.nn.functional.cross_entropy(input=start_logits,
-                                                        label=start_position)
-        end_loss = paddle.nn.functional.cross_entropy(input=end_logits,
-                                                      label=end_position)
-        loss = (start_loss + end_loss) / 2
-        return loss
+        # One fused softmax + NLL launch over the concatenated batch; the
+        # mean over 2B rows equals the average of the two B-row means, so
+        # the loss value is unchanged.
+        logits = paddle.concat([start_logits, end_logits], axis=0)
+        positions = paddle.unsqueeze(
+            paddle.concat([start_position, end_position], axis=0), axis=-1)
+        return paddle.nn.functional.cross_entropy(input=logits,
+                                                  label=positions)
 
 
 def run(args):
@@ -253,42 +504,72 @@ def run(args):
 
     model = model_class.from_pretrained(args.model_name_or_path)
     column_names = train_examples.column_names
+
+    # The tokenized features are deterministic given these arguments, so
+    # cache them on disk explicitly: the partial()-wrapped preprocess
+    # functions defeat the datasets fingerprinting, which would otherwise
+    # re-run the whole preprocessing on every invocation.
+    feature_fingerprint = hashlib.md5(
+        "{}-{}-{}-{}".format(args.model_name_or_path, args.max_seq_length,
+                             args.doc_stride,
+                             args.version_2_with_negative).encode()).hexdigest()
+    os.makedirs(args.output_dir, exist_ok=True)
     if paddle.distributed.get_world_size() > 1:
         model = paddle.DataParallel(model)
 
     if args.do_train:
-        if args.fp16:
+        # bfloat16 has the same dynamic range as fp32, so it needs neither
+        # the GradScaler nor its unscale/skip-step bookkeeping.
+        use_scaler = args.fp16 and not args.bf16
+        if use_scaler:
             scaler = GradScaler(init_loss_scaling=args.init_loss_scaling)
-        train_ds = train_examples.map(partial(prepare_train_features,
-                                              tokenizer=tokenizer,
-                                              args=args),
-                                      batched=True,
-                                      remove_columns=column_names,
-                                      num_proc=4)
+        train_ds = train_examples.map(
+            partial(prepare_train_features, tokenizer=tokenizer, args=args),
+            batched=True,
+            batch_size=2000,
+            remove_columns=column_names,
+            num_proc=min(os.cpu_count() or 4,
+                         len(train_examples) // 1000 + 1),
+            cache_file_name=os.path.join(
+                args.output_dir,
+                "train_feat_{}.arrow".format(feature_fingerprint)),
+            load_from_cache_file=True,
+            writer_batch_size=10000)
         train_batch_sampler = paddle.io.DistributedBatchSampler(
             train_ds, batch_size=args.batch_size, shuffle=True)
-        train_batchify_fn = DataCollatorWithPadding(tokenizer)
+        train_batchify_fn = NumpyPadCollator(tokenizer)
 
+        # Collate in worker processes so padding overlaps the
+        # forward/backward pass; persistent workers avoid the per-epoch
+        # respawn cost.
         train_data_loader = DataLoader(dataset=train_ds,
                                        batch_sampler=train_batch_sampler,
                                        collate_fn=train_batchify_fn,
-                                       return_list=True)
-
-        num_training_steps = args.max_steps if args.max_steps > 0 else len(
-            train_data_loader) * args.num_train_epochs
-        num_train_epochs = math.ceil(num_training_steps /
-                                     len(train_data_loader))
+                                       num_workers=4,
+                                       use_shared_memory=True,
+                                       persistent_workers=True,
+                                       return_list=True,
+                                       **LOADER_PREFETCH_KWARGS)
+
+        accum_steps = args.gradient_accumulation_steps
+        steps_per_epoch = max(len(train_data_loader) // accum_steps, 1)
+        num_training_steps = args.max_steps if args.max_steps > 0 else (
+            steps_per_epoch * args.num_train_epochs)
+        num_train_epochs = math.ceil(num_training_steps / steps_per_epoch)
 
         lr_scheduler = LinearDecayWithWarmup(args.learning_rate,
                                              num_training_steps,
                                              args.warmup_proportion)
 
         # Generate parameter names needed to perform weight decay.
-        # All bias and LayerNorm parameters are excluded.
-        decay_params = [
+        # All bias and LayerNorm parameters are excluded. A set makes the
+        # per-parameter apply_decay_param_fun probe O(1) instead of a
+        # linear scan of the name list on every optimizer step.
+        no_decay = ("bias", "norm")
+        decay_params = {
             p.name for n, p in model.named_parameters()
-            if not any(nd in n for nd in ["bias", "norm"])
-        ]
+            if not any(nd in n for nd in no_decay)
+        }
         optimizer = paddle.optimizer.AdamW(
             learning_rate=lr_scheduler,
             epsilon=args.adam_epsilon,
@@ -302,9 +583,15 @@ def run(args):
         print("number training steps: ", num_training_steps)
         for epoch in range(num_train_epochs):
             for step, batch in enumerate(train_data_loader):
-                with auto_cast(enable=args.fp16,
-                               custom_white_list=["softmax", "gelu"]):
-                    global_step += 1
+                if args.bf16:
+                    amp_guard = auto_cast(enable=True,
+                                          dtype='bfloat16',
+                                          custom_black_list=["reduce_sum"])
+                else:
+                    amp_guard = auto_cast(
+                        enable=args.fp16,
+                        custom_white_list=["softmax", "gelu"])
+                with amp_guard:
                     logits = model(input_ids=batch['input_ids'],
                                    token_type_ids=batch['token_type_ids'],
                                    attention_mask=batch['attention_mask'])
@@ -312,6 +599,25 @@ def run(args):
                         logits,
                         (batch['start_positions'], batch['end_positions']))
 
+                is_accum_step = (step + 1) % accum_steps != 0
+                backward_loss = loss / accum_steps if accum_steps > 1 else loss
+                # Skip the gradient allreduce on micro-steps that do not
+                # update the parameters; only the final micro-step of each
+                # accumulation window synchronizes across workers.
+                if is_accum_step and isinstance(model, paddle.DataParallel):
+                    grad_sync_guard = model.no_sync()
+                else:
+                    grad_sync_guard = contextlib.ExitStack()
+                with grad_sync_guard:
+                    if use_scaler:
+                        scaler.scale(backward_loss).backward()
+                    else:
+                        backward_loss.backward()
+
+                if is_accum_step:
+                    continue
+
+                global_step += 1
                 if global_step % args.logging_steps == 0:
                     print(
                         "global step %d, epoch: %d, batch: %d, loss: %f, speed: %.2f step/s"
@@ -319,13 +625,10 @@ def run(args):
                            args.logging_steps / (time.time() - tic_train)))
                     tic_train = time.time()
 
-                if args.fp16:
-                    scaled = scaler.scale(loss)
-                    scaled.backward()
+                if use_scaler:
                     scaler.step(optimizer)
                     scaler.update()
                 else:
-                    loss.backward()
                     optimizer.step()
 
                 lr_scheduler.step()
@@ -347,25 +650,47 @@ def run(args):
                         break
 
     if args.do_predict and rank == 0:
-        dev_ds = dev_examples.map(partial(prepare_validation_features,
-                                          tokenizer=tokenizer,
-                                          args=args),
-                                  batched=True,
-                                  remove_columns=column_names,
-                                  num_proc=4)
-        dev_batch_sampler = paddle.io.BatchSampler(dev_ds,
-                                                   batch_size=args.batch_size,
-                                                   shuffle=False)
+        dev_ds = dev_examples.map(
+            partial(prepare_validation_features, tokenizer=tokenizer,
+                    args=args),
+            batched=True,
+            batch_size=2000,
+            remove_columns=column_names,
+            num_proc=min(os.cpu_count() or 4, len(dev_examples) // 1000 + 1),
+            cache_file_name=os.path.join(
+                args.output_dir,
+                "dev_feat_{}.arrow".format(feature_fingerprint)),
+            load_from_cache_file=True,
+            writer_batch_size=10000)
         dev_ds_for_model = dev_ds.remove_columns(
             ["example_id", "offset_mapping"])
-        dev_batchify_fn = DataCollatorWithPadding(tokenizer)
+        # Batch features of similar length together so padded compute is not
+        # wasted on the SQuAD long tail; evaluate() restores the original
+        # feature order before computing predictions.
+        sorted_indices = np.argsort(
+            np.array([len(ids) for ids in dev_ds_for_model['input_ids']]),
+            kind='stable')
+        dev_batch_sampler = SortedBatchSampler(sorted_indices,
+                                               args.batch_size)
+        dev_batchify_fn = NumpyPadCollator(tokenizer)
 
         dev_data_loader = DataLoader(dataset=dev_ds_for_model,
                                      batch_sampler=dev_batch_sampler,
                                      collate_fn=dev_batchify_fn,
-                                     return_list=True)
-
-        evaluate(model, dev_data_loader, dev_examples, dev_ds, args)
+                                     num_workers=4,
+                                     use_shared_memory=True,
+                                     return_list=True,
+                                     **LOADER_PREFETCH_KWARGS)
+
+        predictor = create_inference_predictor(
+            model, args) if args.use_inference else None
+        evaluate(model,
+                 dev_data_loader,
+                 dev_examples,
+                 dev_ds,
+                 args,
+                 predictor=predictor,
+                 restore_indices=sorted_indices)
 
 
 if __name__ == "__main__":
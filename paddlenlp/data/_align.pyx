@@ -0,0 +1,49 @@
+# cython: boundscheck=False, wraparound=False, infer_types=True
+# cython: language_level=3
+# Copyright (c) 2022 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from libc.stdint cimport int32_t, int8_t
+
+
+cpdef tuple label_answer_span(int32_t[:, ::1] offsets, int8_t[::1] seq_ids,
+                              int32_t start_char, int32_t end_char,
+                              int32_t cls_index):
+    """
+    Locate the start/end token indices of the answer character span
+    ``[start_char, end_char)`` inside the context part (``seq_ids == 1``) of
+    one tokenized feature. Returns ``(cls_index, cls_index)`` when the answer
+    is out of the span. The loops run as typed C code over contiguous
+    memoryviews, mirroring the pure-Python labeling logic of the SQuAD-style
+    feature preparation.
+    """
+    cdef Py_ssize_t n = offsets.shape[0]
+    cdef Py_ssize_t token_start_index = 0
+    cdef Py_ssize_t token_end_index = n - 1
+
+    while seq_ids[token_start_index] != 1:
+        token_start_index += 1
+    while seq_ids[token_end_index] != 1:
+        token_end_index -= 1
+    token_end_index -= 1
+
+    if not (offsets[token_start_index, 0] <= start_char
+            and offsets[token_end_index, 1] >= end_char):
+        return cls_index, cls_index
+
+    while token_start_index < n and offsets[token_start_index, 0] <= start_char:
+        token_start_index += 1
+    while offsets[token_end_index, 1] >= end_char:
+        token_end_index -= 1
+    return token_start_index - 1, token_end_index + 1
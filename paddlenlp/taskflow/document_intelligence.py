@@ -13,7 +13,9 @@
 # limitations under the License.
 
 import os
+import heapq
 import collections
+import numpy as np
 import paddle
 from ..transformers import AutoTokenizer
 from .utils import download_file, ImageReader, get_doc_pred, find_answer_pos
@@ -96,14 +98,17 @@ class DocPromptTask(Task):
            2) Generate the other model inputs from the raw text and token ids.
         """
         preprocess_results = self._check_input_text(inputs)
+        # paddleocr's ocr() only accepts a single image when detection is
+        # on, so the documents without user-provided word boxes are
+        # processed one call per document.
         for example in preprocess_results:
             if "word_boxes" in example.keys():
-                ocr_result = example["word_boxes"]
+                example["ocr_result"] = example["word_boxes"]
                 example["ocr_type"] = "word_boxes"
             else:
-                ocr_result = self._ocr.ocr(example["doc"], cls=True)
                 example["ocr_type"] = "ppocr"
-            example["ocr_result"] = ocr_result
+                example["ocr_result"] = self._ocr.ocr(example["doc"],
+                                                      cls=True)
         return preprocess_results
 
     def _run_model(self, inputs):
@@ -162,9 +167,21 @@ class DocPromptTask(Task):
                 for feature in all_features:
                     example_index_to_features[feature.qas_id].append(feature)
 
-                unique_id_to_result = {}
-                for result in all_results:
-                    unique_id_to_result[result.unique_id] = result
+                # The unique ids come out of the predictor as contiguous
+                # integers, but the reader's counter starts at a large base
+                # and keeps growing across calls, so the dense position
+                # array is rebased at the smallest id of this batch.
+                unique_ids_arr = np.array([r.unique_id for r in all_results],
+                                          dtype=np.int64)
+                if all_results:
+                    min_uid = int(unique_ids_arr.min())
+                    max_uid = int(unique_ids_arr.max())
+                else:
+                    min_uid, max_uid = 0, -1
+                uid_to_row = np.full(max_uid - min_uid + 1, -1, dtype=np.int32)
+                if all_results:
+                    uid_to_row[unique_ids_arr - min_uid] = np.arange(
+                        len(all_results), dtype=np.int32)
 
                 all_predictions = []
 
@@ -176,9 +193,12 @@ class DocPromptTask(Task):
                     preds = []
                     # keep track of the minimum score of null start+end of position 0
                     for feature in features:
-                        if feature.unique_id not in unique_id_to_result:
+                        if not min_uid <= feature.unique_id <= max_uid:
+                            continue
+                        row = uid_to_row[feature.unique_id - min_uid]
+                        if row < 0:
                             continue
-                        result = unique_id_to_result[feature.unique_id]
+                        result = all_results[row]
 
                         # find preds
                         ans_pos = find_answer_pos(result.seq_logits, feature)
@@ -195,8 +215,12 @@ class DocPromptTask(Task):
                             'end': -1
                         })
                     else:
-                        preds = sorted(
-                            preds, key=lambda x: x["prob"])[::-1][:self._topn]
+                        # Only the top-n predictions are kept, so a partial
+                        # selection is enough: O(n log k) instead of the
+                        # O(n log n) full sort.
+                        preds = heapq.nlargest(self._topn,
+                                               preds,
+                                               key=lambda x: x["prob"])
                     all_predictions.append({
                         "prompt": example_query,
                         "result": preds
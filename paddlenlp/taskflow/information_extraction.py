@@ -453,8 +453,10 @@ class UIETask(Task):
             input_texts, max_predict_len, split_sentence=self._split_sentence)
 
         short_texts_prompts = []
-        for k, v in self.input_mapping.items():
-            short_texts_prompts.extend([prompts[k] for i in range(len(v))])
+        indptr = self.input_mapping[0]
+        for k in range(len(indptr) - 1):
+            short_texts_prompts.extend([prompts[k]] *
+                                       int(indptr[k + 1] - indptr[k]))
         short_inputs = [{
             "text": short_input_texts[i],
             "prompt": short_texts_prompts[i]
@@ -566,7 +568,9 @@ class UIETask(Task):
                 break
             else:
                 break
-        for k, vs in input_mapping.items():
+        indptr, indices = input_mapping
+        for k in range(len(indptr) - 1):
+            vs = indices[indptr[k]:indptr[k + 1]]
             if is_cls_task:
                 cls_options = {}
                 single_results = []
@@ -15,10 +15,18 @@
 
 import os
 import abc
+import glob
+import importlib.util
+import json
 import math
+import queue
+import threading
+import time
 from abc import abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
 from multiprocessing import cpu_count
 
+import numpy as np
 import paddle
 from paddle.dataset.common import md5file
 
@@ -26,6 +34,90 @@ from ..utils.env import PPNLP_HOME
 from ..utils.log import logger
 from .utils import download_check, static_mode_guard, dygraph_mode_guard, download_file, cut_chinese_sent
 
+# Sentinel marking the end of a stage's output in the pipelined call path.
+_PIPELINE_END = object()
+
+# cpu_count() can be surprisingly slow on some platforms, so the default
+# thread count is probed once at import time instead of per Task.
+_DEFAULT_NUM_THREADS = max(1, math.ceil(cpu_count() / 2))
+
+
+def _cpu_supports(flag):
+    """
+    Whether the host CPU advertises the given isa flag in `/proc/cpuinfo`.
+    Conservatively returns False on platforms without procfs.
+    """
+    try:
+        with open('/proc/cpuinfo') as f:
+            return flag in f.read()
+    except IOError:
+        return False
+
+
+def _cached_md5(path):
+    """
+    Return the md5 of `path`, caching it in a sidecar `<path>.md5cache`
+    JSON keyed by (size, mtime). Unchanged multi-hundred-megabyte weight
+    files are then not re-read and re-hashed on every Task construction.
+    """
+    st = os.stat(path)
+    cache_path = path + '.md5cache'
+    key = [st.st_size, int(st.st_mtime)]
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if cached.get('key') == key:
+            return cached.get('md5')
+    except (IOError, ValueError):
+        pass
+    file_md5 = md5file(path)
+    try:
+        with open(cache_path, 'w') as f:
+            json.dump({'key': key, 'md5': file_md5}, f)
+    except IOError:
+        pass
+    return file_md5
+
+
+def _build_chunk_offsets(sen_lens, max_text_len):
+    """
+    Compute the (owning sentence, start, end) character offsets of every
+    chunk produced by cutting sentences of the given lengths into pieces of
+    at most `max_text_len` characters. Written as plain integer loops over
+    typed arrays so that Numba can compile it when available; empty
+    sentences keep producing one empty chunk, as the Python splitter did.
+    """
+    num_chunks = 0
+    for i in range(len(sen_lens)):
+        n = (sen_lens[i] + max_text_len - 1) // max_text_len
+        num_chunks += n if n > 0 else 1
+    owners = np.empty(num_chunks, dtype=np.int32)
+    starts = np.empty(num_chunks, dtype=np.int32)
+    ends = np.empty(num_chunks, dtype=np.int32)
+    idx = 0
+    for i in range(len(sen_lens)):
+        if sen_lens[i] == 0:
+            owners[idx] = i
+            starts[idx] = 0
+            ends[idx] = 0
+            idx += 1
+            continue
+        for start in range(0, sen_lens[i], max_text_len):
+            owners[idx] = i
+            starts[idx] = start
+            end = start + max_text_len
+            ends[idx] = end if end < sen_lens[i] else sen_lens[i]
+            idx += 1
+    return owners, starts, ends
+
+
+try:
+    from numba import njit
+
+    _build_chunk_offsets = njit(cache=True)(_build_chunk_offsets)
+except ImportError:
+    pass
+
 
 class Task(metaclass=abc.ABCMeta):
     """
@@ -37,6 +129,14 @@ class Task(metaclass=abc.ABCMeta):
         kwargs (dict, optional): Additional keyword arguments passed along to the specific task. 
     """
 
+    # Tasks that pass per-call state between _preprocess, _run_model and
+    # _postprocess through instance attributes (e.g. self.input_mapping
+    # written by the splitter) must leave this False: the pipelined and
+    # coalesced call paths run stages of different calls concurrently on
+    # separate threads, which would clobber such state. Subclasses whose
+    # stages only communicate through the passed payload may opt in.
+    _stateless_stages = False
+
     def __init__(self, model, task, priority_path=None, **kwargs):
         self.model = model
         self.task = task
@@ -50,18 +150,45 @@ class Task(metaclass=abc.ABCMeta):
         self._config = None
         self._custom_model = False
         self._param_updated = False
-        self._num_threads = self.kwargs[
-            'num_threads'] if 'num_threads' in self.kwargs else math.ceil(
-                cpu_count() / 2)
-        self._infer_precision = self.kwargs[
-            'precision'] if 'precision' in self.kwargs else 'fp32'
+        # Backend predictor state: onnxruntime sessions are thread-safe and
+        # stored directly, while Paddle Inference predictors are cloned per
+        # thread (see `_thread_predictor_state`).
+        self._onnx_predictor = None
+        self._base_predictor = None
+        self._thread_predictors = {}
+        self._predictor_lock = threading.Lock()
+        self._num_threads = self.kwargs.get('num_threads',
+                                            _DEFAULT_NUM_THREADS)
+        self._infer_precision = self.kwargs.get('precision', 'fp32')
         # Default to use Paddle Inference
         self._predictor_type = 'paddle-inference'
         # The root directory for storing Taskflow related files, default to ~/.paddlenlp.
-        self._home_path = self.kwargs[
-            'home_path'] if 'home_path' in self.kwargs else PPNLP_HOME
-        self._task_flag = self.kwargs[
-            'task_flag'] if 'task_flag' in self.kwargs else self.model
+        self._home_path = self.kwargs.get('home_path', PPNLP_HOME)
+        self._task_flag = self.kwargs.get('task_flag', self.model)
+        # Chunk size for the threaded three-stage pipeline in `__call__`,
+        # 0 disables it and keeps the sequential path.
+        self._pipeline_batch_size = self.kwargs.get('pipeline_batch_size', 0)
+        if self._pipeline_batch_size > 0 and not self._stateless_stages:
+            logger.warning(
+                "pipeline_batch_size is ignored: {} passes state between its "
+                "stages through instance attributes, which is unsafe to "
+                "pipeline.".format(type(self).__name__))
+            self._pipeline_batch_size = 0
+        # Optional request coalescing for serving: concurrent small calls
+        # are merged into one predictor batch by a background thread.
+        self._coalesce_calls = self.kwargs.get('coalesce_calls', False)
+        if self._coalesce_calls and not self._stateless_stages:
+            logger.warning(
+                "coalesce_calls is ignored: {} passes state between its "
+                "stages through instance attributes, which is unsafe to run "
+                "from the coalescing worker thread.".format(
+                    type(self).__name__))
+            self._coalesce_calls = False
+        self._dynamic_batch_size = self.kwargs.get('dynamic_batch_size', 16)
+        self._max_wait_ms = self.kwargs.get('max_wait_ms', 20)
+        self._coalesce_queue = None
+        self._coalesce_thread = None
+        self._coalesce_lock = threading.Lock()
         if 'task_path' in self.kwargs:
             self._task_path = self.kwargs['task_path']
             self._custom_model = True
@@ -91,6 +218,10 @@ class Task(metaclass=abc.ABCMeta):
         Transform the raw text to the model inputs, two steps involved:
            1) Transform the raw text to token ids.
            2) Generate the other model inputs from the raw text and token ids.
+        Implementations should treat `inputs` as a batch: call the tokenizer
+        once over the whole list and return batch-level id arrays, rather
+        than tokenizing sample by sample. The pipelined and coalesced call
+        paths rely on this contract.
         """
 
     @abstractmethod
@@ -115,44 +246,67 @@ class Task(metaclass=abc.ABCMeta):
         """
         Check files required by the task.
         """
+        to_verify = []
+        to_download = []
+        urls_for_model = self.resource_files_urls[self.model]
         for file_id, file_name in self.resource_files_names.items():
             path = os.path.join(self._task_path, file_name)
-            url = self.resource_files_urls[self.model][file_id][0]
-            md5 = self.resource_files_urls[self.model][file_id][1]
+            url, md5 = urls_for_model[file_id][:2]
 
-            downloaded = True
             if not os.path.exists(path):
-                downloaded = False
-            else:
-                if not self._custom_model:
-                    if os.path.exists(path):
-                        # Check whether the file is updated
-                        if not md5file(path) == md5:
-                            downloaded = False
-                            if file_id == "model_state":
-                                self._param_updated = True
-                    else:
-                        downloaded = False
-            if not downloaded:
-                download_file(self._task_path, file_name, url, md5)
+                to_download.append((file_name, url, md5))
+            elif not self._custom_model:
+                to_verify.append((file_id, file_name, path, url, md5))
+
+        if to_verify:
+            # Hashing is IO plus GIL-releasing hashlib work, so the files
+            # verify in parallel on a thread pool.
+            with ThreadPoolExecutor(max_workers=min(
+                    self._num_threads, len(to_verify))) as executor:
+                verified = list(
+                    executor.map(lambda item: _cached_md5(item[2]) == item[4],
+                                 to_verify))
+            # Check whether the files are updated
+            for (file_id, file_name, path, url,
+                 md5), is_valid in zip(to_verify, verified):
+                if not is_valid:
+                    if file_id == "model_state":
+                        self._param_updated = True
+                    to_download.append((file_name, url, md5))
+
+        for file_name, url, md5 in to_download:
+            download_file(self._task_path, file_name, url, md5)
 
     def _check_predictor_type(self):
-        if paddle.get_device() == 'cpu' and self._infer_precision == 'fp16':
+        if self._infer_precision != 'fp16':
+            return
+        if paddle.get_device() == 'cpu':
             logger.warning(
                 "The inference precision is change to 'fp32', 'fp16' inference only takes effect on gpu."
             )
+            self._infer_precision = 'fp32'
+            return
+        # Explicit fp16 backend precedence on gpu: the paddle-inference
+        # TensorRT sub-graph engine when this paddle build carries
+        # TensorRT, else the onnxruntime fp16 stack, else fp32.
+        try:
+            if paddle.framework.core.is_compiled_with_tensorrt():
+                return
+        except AttributeError:
+            pass
+        # Only probe for the onnx stack here: importing it (mainly
+        # onnxruntime's shared libs) costs seconds and is deferred
+        # to _prepare_onnx_mode, which is the only user.
+        if all(
+                importlib.util.find_spec(module) is not None
+                for module in ('onnx', 'onnxruntime', 'paddle2onnx',
+                               'onnxconverter_common')):
+            self._predictor_type = 'onnxruntime'
         else:
-            if self._infer_precision == 'fp16':
-                try:
-                    import onnx
-                    import onnxruntime as ort
-                    import paddle2onnx
-                    from onnxconverter_common import float16
-                    self._predictor_type = 'onnxruntime'
-                except:
-                    logger.warning(
-                        "The inference precision is change to 'fp32', please install the dependencies that required for 'fp16' inference, pip install onnxruntime-gpu onnx onnxconverter-common"
-                    )
+            logger.warning(
+                "The inference precision is change to 'fp32': this paddle build has no TensorRT and the dependencies required for 'fp16' inference are not installed, pip install onnxruntime-gpu onnx onnxconverter-common"
+            )
+            self._infer_precision = 'fp32'
 
     def _prepare_static_mode(self):
         """
@@ -161,26 +315,113 @@ class Task(metaclass=abc.ABCMeta):
         if paddle.get_device() == 'cpu':
             self._config.disable_gpu()
             self._config.enable_mkldnn()
+            # Reduced-precision mkldnn kernels are only a win on CPUs with
+            # the matching isa extension; without it they fall back to
+            # emulation that is slower than the fp32 path.
+            if self._infer_precision == 'bf16':
+                if _cpu_supports('avx512_bf16'):
+                    self._config.enable_mkldnn_bfloat16()
+                else:
+                    logger.warning(
+                        "The CPU does not support the avx512_bf16 instructions, "
+                        "the inference will run with 'fp32' precision.")
+            elif self._infer_precision == 'int8':
+                if _cpu_supports('avx512_vnni'):
+                    self._config.enable_mkldnn_int8({'matmul', 'conv2d'})
+                else:
+                    logger.warning(
+                        "The CPU does not support the avx512_vnni instructions, "
+                        "the inference will run with 'fp32' precision.")
         else:
             self._config.enable_use_gpu(100, self.kwargs['device_id'])
             # TODO(linjieccc): enable embedding_eltwise_layernorm_fuse_pass after fixed
             self._config.delete_pass("embedding_eltwise_layernorm_fuse_pass")
+            if self._infer_precision == 'fp16':
+                # Half precision on GPU only takes effect inside a TensorRT
+                # sub-graph; plain GPU inference keeps running in fp32. TRT
+                # needs the real tensor shape ranges to build its engines,
+                # so the first run only records them and later runs enable
+                # the engine with the tuned dynamic shapes.
+                shape_range_file = os.path.join(self._task_path, "static",
+                                                "shape_range_info.pbtxt")
+                if os.path.exists(shape_range_file):
+                    self._config.enable_tensorrt_engine(
+                        workspace_size=1 << 30,
+                        precision_mode=paddle.inference.PrecisionType.Half,
+                        use_static=True)
+                    self._config.enable_tuned_tensorrt_dynamic_shape(
+                        shape_range_file, True)
+                else:
+                    self._config.collect_shape_range_info(shape_range_file)
+        # Persist the autotuned kernel and pass decisions next to the static
+        # model, so later processes skip the cold-start algorithm search.
+        optim_cache_dir = os.path.join(self._task_path, "optim_cache")
+        os.makedirs(optim_cache_dir, exist_ok=True)
+        self._config.set_optim_cache_dir(optim_cache_dir)
         self._config.set_cpu_math_library_num_threads(self._num_threads)
         self._config.switch_use_feed_fetch_ops(False)
         self._config.disable_glog_info()
         self._config.enable_memory_optim()
         if self.task in ["document_question_answering", "knowledge_mining"]:
             self._config.switch_ir_optim(False)
-        self.predictor = paddle.inference.create_predictor(self._config)
-        self.input_names = [name for name in self.predictor.get_input_names()]
-        self.input_handles = [
-            self.predictor.get_input_handle(name)
-            for name in self.predictor.get_input_names()
-        ]
-        self.output_handle = [
-            self.predictor.get_output_handle(name)
-            for name in self.predictor.get_output_names()
-        ]
+        self._base_predictor = paddle.inference.create_predictor(self._config)
+        # The creating thread keeps the base predictor; any other thread
+        # gets a lazily created clone in `_thread_predictor_state`.
+        self._thread_predictors[threading.get_ident()] = (
+            self._build_predictor_state(self._base_predictor))
+
+    def _build_predictor_state(self, predictor):
+        # Query the names once and freeze everything into tuples: the
+        # handles are fetched here and never again, so _run_model loops
+        # iterate cached immutable sequences instead of going back to the
+        # predictor on every call.
+        input_names = tuple(predictor.get_input_names())
+        input_handles = tuple(
+            predictor.get_input_handle(name) for name in input_names)
+        output_handle = tuple(
+            predictor.get_output_handle(name)
+            for name in predictor.get_output_names())
+        return predictor, input_names, input_handles, output_handle
+
+    def _thread_predictor_state(self):
+        """
+        Return (predictor, input_names, input_handles, output_handle) for
+        the calling thread. A Paddle Inference predictor mutates its input
+        handles on every run, so concurrent callers would corrupt each
+        other's feeds through a shared one; instead each thread works on a
+        clone of the base predictor, which shares the weights and only
+        duplicates the execution state.
+        """
+        state = self._thread_predictors.get(threading.get_ident())
+        if state is None:
+            with self._predictor_lock:
+                clone = self._base_predictor.clone()
+            state = self._build_predictor_state(clone)
+            self._thread_predictors[threading.get_ident()] = state
+        return state
+
+    @property
+    def predictor(self):
+        if self._onnx_predictor is not None:
+            return self._onnx_predictor
+        return self._thread_predictor_state()[0]
+
+    @predictor.setter
+    def predictor(self, value):
+        # The onnxruntime session is itself thread-safe and is used as-is.
+        self._onnx_predictor = value
+
+    @property
+    def input_names(self):
+        return self._thread_predictor_state()[1]
+
+    @property
+    def input_handles(self):
+        return self._thread_predictor_state()[2]
+
+    @property
+    def output_handle(self):
+        return self._thread_predictor_state()[3]
 
     def _prepare_onnx_mode(self):
         import onnx
@@ -190,7 +431,20 @@ class Task(metaclass=abc.ABCMeta):
         onnx_dir = os.path.join(self._task_path, 'onnx')
         if not os.path.exists(onnx_dir):
             os.mkdir(onnx_dir)
-        float_onnx_file = os.path.join(onnx_dir, 'model.onnx')
+        # Key the exported models on the source params content, so a
+        # re-downloaded checkpoint invalidates the cache instead of
+        # silently reusing a stale conversion, while unchanged params skip
+        # the expensive paddle2onnx + float16 export entirely.
+        src_hash = _cached_md5(self._static_params_file)[:16]
+        float_onnx_file = os.path.join(onnx_dir,
+                                       'model.{}.onnx'.format(src_hash))
+        fp16_model_file = os.path.join(onnx_dir,
+                                       'fp16_model.{}.onnx'.format(src_hash))
+        # Drop conversions of older checkpoints, including the legacy
+        # unhashed file names.
+        for stale_file in glob.glob(os.path.join(onnx_dir, '*.onnx')):
+            if stale_file not in (float_onnx_file, fp16_model_file):
+                os.unlink(stale_file)
         if not os.path.exists(float_onnx_file):
             onnx_model = paddle2onnx.command.c_paddle_to_onnx(
                 model_file=self._static_model_file,
@@ -199,25 +453,60 @@ class Task(metaclass=abc.ABCMeta):
                 enable_onnx_checker=True)
             with open(float_onnx_file, "wb") as f:
                 f.write(onnx_model)
-        fp16_model_file = os.path.join(onnx_dir, 'fp16_model.onnx')
-        if not os.path.exists(fp16_model_file):
+        # fp16 only pays off on tensor-core GPUs (compute capability >= 7.0);
+        # below that the Cast nodes inserted around every op make the fp16
+        # graph a clear pessimization, so stay on the float32 model.
+        use_fp16 = True
+        try:
+            if paddle.device.cuda.get_device_capability(
+                    self.kwargs['device_id'])[0] < 7:
+                use_fp16 = False
+                logger.warning(
+                    "The GPU does not have tensor cores (compute capability < 7.0), "
+                    "the inference will run with the float32 onnx model.")
+        except Exception:
+            pass
+        if use_fp16 and not os.path.exists(fp16_model_file):
             onnx_model = onnx.load_model(float_onnx_file)
             trans_model = float16.convert_float_to_float16(onnx_model,
                                                            keep_io_types=True)
             onnx.save_model(trans_model, fp16_model_file)
         providers = [('CUDAExecutionProvider', {
-            'device_id': self.kwargs['device_id']
+            'device_id': self.kwargs['device_id'],
+            'arena_extend_strategy': 'kSameAsRequested',
+            'cudnn_conv_algo_search': 'HEURISTIC',
+            'do_copy_in_default_stream': '1',
         })]
         sess_options = ort.SessionOptions()
+        # fp16 transformer models need the full fusion pipeline (fused
+        # attention in particular) to actually beat fp32; also reuse memory
+        # patterns and the environment allocators across runs.
+        sess_options.graph_optimization_level = (
+            ort.GraphOptimizationLevel.ORT_ENABLE_ALL)
+        sess_options.enable_mem_pattern = True
+        sess_options.add_session_config_entry('session.use_env_allocators',
+                                              '1')
         sess_options.intra_op_num_threads = self._num_threads
         sess_options.inter_op_num_threads = self._num_threads
-        self.predictor = ort.InferenceSession(fp16_model_file,
-                                              sess_options=sess_options,
-                                              providers=providers)
-        assert 'CUDAExecutionProvider' in self.predictor.get_providers(), f"The environment for GPU inference is not set properly. " \
-            "A possible cause is that you had installed both onnxruntime and onnxruntime-gpu. " \
-            "Please run the following commands to reinstall: \n " \
-            "1) pip uninstall -y onnxruntime onnxruntime-gpu \n 2) pip install onnxruntime-gpu"
+        self.predictor = ort.InferenceSession(
+            fp16_model_file if use_fp16 else float_onnx_file,
+            sess_options=sess_options,
+            providers=providers)
+        if 'CUDAExecutionProvider' not in self.predictor.get_providers():
+            # Without the CUDA provider the fp16 model would silently run
+            # 2-4x slower than fp32 on CPU, so re-create the session from
+            # the float32 model instead of asserting out.
+            logger.warning(
+                "The environment for GPU inference is not set properly, the inference will "
+                "fall back to the float32 onnx model on CPU. "
+                "A possible cause is that you had installed both onnxruntime and onnxruntime-gpu. "
+                "Please run the following commands to reinstall: \n "
+                "1) pip uninstall -y onnxruntime onnxruntime-gpu \n 2) pip install onnxruntime-gpu"
+            )
+            self.predictor = ort.InferenceSession(
+                float_onnx_file,
+                sess_options=sess_options,
+                providers=['CPUExecutionProvider'])
 
     def _get_inference_model(self):
         """
@@ -225,12 +514,39 @@ class Task(metaclass=abc.ABCMeta):
         """
         inference_model_path = os.path.join(self._task_path, "static",
                                             "inference")
-        if not os.path.exists(inference_model_path +
-                              ".pdiparams") or self._param_updated:
+        meta_path = inference_model_path + ".meta.json"
+        src_params_path = None
+        if 'model_state' in getattr(self, 'resource_files_names', {}):
+            candidate = os.path.join(
+                self._task_path, self.resource_files_names['model_state'])
+            if os.path.exists(candidate):
+                src_params_path = candidate
+        need_convert = not os.path.exists(inference_model_path + ".pdiparams")
+        if not need_convert and self._param_updated:
+            # A checksum mismatch also fires on a fresh download whose
+            # conversion may already exist from a previous session, so only
+            # re-convert when the static model was built from different
+            # source params than the ones on disk.
+            need_convert = True
+            if src_params_path is not None:
+                try:
+                    with open(meta_path) as f:
+                        need_convert = json.load(f).get(
+                            'src_md5') != _cached_md5(src_params_path)
+                except (IOError, ValueError):
+                    pass
+        if need_convert:
             with dygraph_mode_guard():
                 self._construct_model(self.model)
                 self._construct_input_spec()
                 self._convert_dygraph_to_static()
+            if src_params_path is not None:
+                try:
+                    with open(meta_path, 'w') as f:
+                        json.dump({'src_md5': _cached_md5(src_params_path)},
+                                  f)
+                except IOError:
+                    pass
 
         self._static_model_file = inference_model_path + ".pdmodel"
         self._static_params_file = inference_model_path + ".pdiparams"
@@ -282,75 +598,91 @@ class Task(metaclass=abc.ABCMeta):
             split_sentence (bool): If True, sentence-level split will be performed.
         return:
             short_input_texts (List[str]): the short input texts for model inference.
-            input_mapping (dict): mapping between raw text and short input texts.
+            input_mapping (tuple): CSR-style (indptr, indices) int32 arrays mapping
+                each raw text i to its short texts indices[indptr[i]:indptr[i+1]].
         '''
-        input_mapping = {}
-        short_input_texts = []
-        cnt_org = 0
-        cnt_short = 0
-        for text in input_texts:
-            if not split_sentence:
-                sens = [text]
-            else:
-                sens = cut_chinese_sent(text)
-            for sen in sens:
-                lens = len(sen)
-                if lens <= max_text_len:
-                    short_input_texts.append(sen)
-                    if cnt_org not in input_mapping.keys():
-                        input_mapping[cnt_org] = [cnt_short]
-                    else:
-                        input_mapping[cnt_org].append(cnt_short)
-                    cnt_short += 1
-                else:
-                    temp_text_list = [
-                        sen[i:i + max_text_len]
-                        for i in range(0, lens, max_text_len)
-                    ]
-                    short_input_texts.extend(temp_text_list)
-                    short_idx = cnt_short
-                    cnt_short += math.ceil(lens / max_text_len)
-                    temp_text_id = [
-                        short_idx + i for i in range(cnt_short - short_idx)
-                    ]
-                    if cnt_org not in input_mapping.keys():
-                        input_mapping[cnt_org] = temp_text_id
-                    else:
-                        input_mapping[cnt_org].extend(temp_text_id)
-            cnt_org += 1
-        return short_input_texts, input_mapping
+        # Flatten the sentences of all texts, then compute every chunk's
+        # boundaries in one pass of integer index math, which runs as
+        # compiled code when numba is installed. Only the final string
+        # slicing stays in Python.
+        all_sens = []
+        sen_to_text = []
+        for cnt_org, text in enumerate(input_texts):
+            sens = cut_chinese_sent(text) if split_sentence else [text]
+            all_sens.extend(sens)
+            sen_to_text.extend([cnt_org] * len(sens))
+
+        sen_lens = np.array([len(sen) for sen in all_sens], dtype=np.int32)
+        owners, starts, ends = _build_chunk_offsets(sen_lens, max_text_len)
+
+        short_input_texts = [
+            all_sens[owner][start:end] for owner, start, end in zip(
+                owners.tolist(), starts.tolist(), ends.tolist())
+        ]
+        # Chunks are emitted in text order, so the mapping is fully
+        # described by per-text counts: a CSR (indptr, indices) pair
+        # replaces the dict of python lists.
+        sen_to_text_arr = np.asarray(sen_to_text, dtype=np.int32)
+        counts = np.bincount(sen_to_text_arr[owners],
+                             minlength=len(input_texts))
+        indptr = np.concatenate(
+            ([0], np.cumsum(counts))).astype(np.int32)
+        indices = np.arange(len(owners), dtype=np.int32)
+        return short_input_texts, (indptr, indices)
 
     def _auto_joiner(self, short_results, input_mapping, is_dict=False):
         '''
         Join the short results automatically and generate the final results to match with the user inputs.
         Args:
             short_results (List[dict] / List[List[str]] / List[str]): input raw texts.
-            input_mapping (dict): cutting length.
+            input_mapping (tuple): CSR-style (indptr, indices) arrays produced by
+                `_auto_splitter`.
             is_dict (bool): whether the element type is dict, default to False.
         return:
             short_input_texts (List[str]): the short input texts for model inference.
         '''
         concat_results = []
-        elem_type = {} if is_dict else []
-        for k, vs in input_mapping.items():
-            single_results = elem_type
-            for v in vs:
-                if len(single_results) == 0:
-                    single_results = short_results[v]
-                elif isinstance(elem_type, list):
-                    single_results.extend(short_results[v])
-                elif isinstance(elem_type, dict):
-                    for sk in single_results.keys():
-                        if isinstance(single_results[sk], str):
-                            single_results[sk] += short_results[v][sk]
-                        else:
-                            single_results[sk].extend(short_results[v][sk])
-                else:
-                    raise ValueError(
-                        "Invalid element type, the type of results "
-                        "for each element should be list of dict, "
-                        "but {} received.".format(type(single_results)))
-            concat_results.append(single_results)
+        indptr, indices = input_mapping
+        if is_dict:
+            # Resolve every key's merge operation once from the schema of
+            # the first short result, instead of re-running isinstance and
+            # a .keys() iteration for every joined fragment. String values
+            # are gathered into buckets and joined once per key, so a text
+            # stitched from n fragments costs O(n) instead of the O(n^2)
+            # of repeated `+=`.
+            str_keys = []
+            list_keys = []
+            if short_results:
+                for sk, sv in short_results[0].items():
+                    (str_keys if isinstance(sv, str) else list_keys).append(sk)
+            for k in range(len(indptr) - 1):
+                vs = indices[indptr[k]:indptr[k + 1]]
+                single_results = {}
+                str_buckets = {}
+                for v in vs:
+                    new = short_results[v]
+                    if len(single_results) == 0:
+                        single_results = new
+                        str_buckets = {sk: [new[sk]] for sk in str_keys}
+                    else:
+                        for sk in str_keys:
+                            str_buckets[sk].append(new[sk])
+                        for sk in list_keys:
+                            single_results[sk].extend(new[sk])
+                if len(single_results) != 0:
+                    for sk in str_keys:
+                        single_results[sk] = ''.join(str_buckets[sk])
+                concat_results.append(single_results)
+        else:
+            for k in range(len(indptr) - 1):
+                vs = indices[indptr[k]:indptr[k + 1]]
+                single_results = []
+                for v in vs:
+                    if len(single_results) == 0:
+                        single_results = short_results[v]
+                    else:
+                        single_results.extend(short_results[v])
+                concat_results.append(single_results)
         return concat_results
 
     def help(self):
@@ -359,7 +691,150 @@ class Task(metaclass=abc.ABCMeta):
         """
         print("Examples:\n{}".format(self._usage))
 
+    def _pipeline_call(self, input_texts):
+        """
+        Run preprocess, model inference and postprocess as a three-stage
+        producer/consumer pipeline over chunks of `input_texts`. The stages
+        are connected with bounded queues and run on their own threads, so
+        the tokenization of chunk N+1 and the postprocess of chunk N-1
+        overlap with the predictor executing chunk N (the inference core
+        releases the GIL). The per-chunk results are concatenated, so this
+        path is only taken for tasks whose postprocess output is a list
+        aligned with the inputs.
+        """
+        chunk_size = self._pipeline_batch_size
+        chunks = [
+            input_texts[i:i + chunk_size]
+            for i in range(0, len(input_texts), chunk_size)
+        ]
+        infer_queue = queue.Queue(maxsize=2)
+        post_queue = queue.Queue(maxsize=2)
+
+        def produce():
+            try:
+                for chunk in chunks:
+                    # `_preprocess` expects the call-args shape, where the
+                    # text list is the first positional argument.
+                    infer_queue.put(self._preprocess((chunk, )))
+                infer_queue.put(_PIPELINE_END)
+            except Exception as e:
+                infer_queue.put(e)
+
+        def infer():
+            while True:
+                item = infer_queue.get()
+                if item is _PIPELINE_END or isinstance(item, Exception):
+                    post_queue.put(item)
+                    return
+                try:
+                    post_queue.put(self._run_model(item))
+                except Exception as e:
+                    post_queue.put(e)
+                    return
+
+        producer = threading.Thread(target=produce, daemon=True)
+        infer_worker = threading.Thread(target=infer, daemon=True)
+        producer.start()
+        infer_worker.start()
+
+        results = []
+        while True:
+            item = post_queue.get()
+            if item is _PIPELINE_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            results.extend(self._postprocess(item))
+        producer.join()
+        infer_worker.join()
+        if len(results) != len(input_texts):
+            raise RuntimeError(
+                "The pipelined call produced {} results for {} input texts; "
+                "this task's postprocess output is not aligned with its "
+                "inputs, please disable pipeline_batch_size for it.".format(
+                    len(results), len(input_texts)))
+        return results
+
+    def _coalesce_worker(self):
+        """
+        Drain the coalescing queue: starting from one blocking get, keep
+        collecting calls until the batch reaches `dynamic_batch_size`
+        samples or the oldest call has waited `max_wait_ms`, then run the
+        three stages once over the concatenated inputs and scatter the
+        result slices back through the per-call futures.
+        """
+        while True:
+            texts, future = self._coalesce_queue.get()
+            batch = [(texts, future)]
+            num_samples = len(texts)
+            deadline = time.monotonic() + self._max_wait_ms / 1000.0
+            while num_samples < self._dynamic_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._coalesce_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                num_samples += len(item[0])
+            merged_texts = []
+            for texts, _ in batch:
+                merged_texts.extend(texts)
+            try:
+                # `_preprocess` expects the call-args shape, where the text
+                # list is the first positional argument.
+                results = self._postprocess(
+                    self._run_model(self._preprocess((merged_texts, ))))
+                if len(results) != len(merged_texts):
+                    raise RuntimeError(
+                        "The coalesced call produced {} results for {} "
+                        "input texts; this task's postprocess output is not "
+                        "aligned with its inputs, please disable "
+                        "coalesce_calls for it.".format(
+                            len(results), len(merged_texts)))
+                offset = 0
+                for texts, future in batch:
+                    future.set_result(results[offset:offset + len(texts)])
+                    offset += len(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def _coalesced_call(self, input_texts):
+        """
+        Submit `input_texts` to the shared coalescing worker and block on
+        this call's future. Like the pipelined path, this requires the
+        postprocess output to be a list aligned with the inputs.
+        """
+        if self._coalesce_thread is None:
+            with self._coalesce_lock:
+                if self._coalesce_thread is None:
+                    self._coalesce_queue = queue.Queue()
+                    self._coalesce_thread = threading.Thread(
+                        target=self._coalesce_worker, daemon=True)
+                    self._coalesce_thread.start()
+        future = Future()
+        self._coalesce_queue.put((input_texts, future))
+        return future.result()
+
     def __call__(self, *args):
+        # `Taskflow.__call__` forwards the user arguments as one tuple, so
+        # a batched text list arrives as args[0][0]; direct calls with a
+        # bare list are unwrapped the same way.
+        input_texts = None
+        if len(args) == 1:
+            if isinstance(args[0], list):
+                input_texts = args[0]
+            elif isinstance(args[0], tuple) and len(
+                    args[0]) == 1 and isinstance(args[0][0], list):
+                input_texts = args[0][0]
+        if input_texts is not None:
+            if self._coalesce_calls:
+                return self._coalesced_call(input_texts)
+            if self._pipeline_batch_size > 0 and len(
+                    input_texts) > self._pipeline_batch_size:
+                return self._pipeline_call(input_texts)
         inputs = self._preprocess(*args)
         outputs = self._run_model(inputs)
         results = self._postprocess(outputs)
@@ -49,6 +49,15 @@ def get_package_data_files(package, data, package_dir=None):
     return all_files
 
 
+# Optional Cython accelerators. They are built when Cython is available at
+# build time; at runtime the callers fall back to pure-Python implementations
+# when the compiled modules are absent.
+try:
+    from Cython.Build import cythonize
+    ext_modules = cythonize([os.path.join('paddlenlp', 'data', '_align.pyx')])
+except ImportError:
+    ext_modules = []
+
 setuptools.setup(
     name="paddlenlp",
     version=paddlenlp.__version__,
@@ -74,6 +83,7 @@ setuptools.setup(
                                ['visual_backbone.yaml']),
     },
     setup_requires=['cython', 'numpy'],
+    ext_modules=ext_modules,
     install_requires=REQUIRED_PACKAGES,
     python_requires='>=3.6',
     classifiers=[